@@ -3,19 +3,72 @@
 Data generator for OpenSearch + Redis pipeline
 """
 
-import json
+import os
 import random
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from itertools import repeat
 from typing import List, Dict, Any
 import boto3
+import numpy as np
+import orjson
 import requests
 import logging
+from botocore.config import Config
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared HTTP session so repeated API submissions reuse pooled keep-alive connections;
+# only connection failures are retried, since a resent POST could duplicate a batch
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.3)
+))
+
+# Lambda client shared across sends (and warm invocations)
+_lambda_client = None
+
+def _get_lambda_client():
+    """Get the shared Lambda client"""
+    global _lambda_client
+    if _lambda_client is None:
+        _lambda_client = boto3.client(
+            'lambda',
+            config=Config(max_pool_connections=50, retries={'max_attempts': 2})
+        )
+    return _lambda_client
+
+# Field order for records built column-wise in bulk generation
+_EVENT_FIELDS = (
+    'id', 'user_id', 'session_id', 'timestamp', 'event_type', 'product_id',
+    'category', 'price', 'quantity', 'currency', 'user_agent', 'ip_address',
+    'location', 'device_type', 'referrer', 'page_url', 'revenue'
+)
+_PRODUCT_FIELDS = (
+    'id', 'name', 'category', 'subcategory', 'price', 'currency', 'brand',
+    'description', 'tags', 'stock_quantity', 'weight', 'dimensions', 'rating',
+    'review_count', 'created_at', 'updated_at', 'is_active', 'image_url'
+)
+_DIMENSION_FIELDS = ('length', 'width', 'height')
+
+def _fast_ids(count: int) -> List[str]:
+    """Generate random 128-bit hex ids from a single urandom read"""
+    raw = os.urandom(16 * count).hex()
+    return [raw[i:i + 32] for i in range(0, 32 * count, 32)]
+
+def _iso_timestamps(epoch_us: np.ndarray) -> List[str]:
+    """Format epoch microseconds as ISO-8601 UTC strings in one vectorized pass"""
+    stamps = np.datetime_as_string(epoch_us.astype('datetime64[us]'), unit='us')
+    return np.char.add(stamps, 'Z').tolist()
+
 class DataGenerator:
     """E-commerce data generator"""
     
@@ -56,6 +109,30 @@ class DataGenerator:
             {'city': 'Houston', 'state': 'TX', 'country': 'US'},
             {'city': 'Phoenix', 'state': 'AZ', 'country': 'US'},
         ]
+        
+        self.device_types = ['desktop', 'mobile', 'tablet']
+        self.referrers = ['google.com', 'facebook.com', 'direct', 'email', 'twitter.com']
+        self.payment_methods = ['credit_card', 'paypal', 'apple_pay', 'google_pay']
+        
+        # Single generator reused for all bulk sampling
+        self.rng = np.random.default_rng()
+        
+        # Object arrays so bulk sampling is one index draw plus np.take;
+        # location dicts are shared rather than rebuilt per event
+        self._choices = {
+            name: np.array(getattr(self, name), dtype=object)
+            for name in ('categories', 'event_types', 'product_names', 'search_queries',
+                         'user_agents', 'locations', 'device_types', 'referrers',
+                         'payment_methods')
+        }
+        
+        # Preformatted string pools so bulk records are built by indexing
+        # instead of per-event string formatting
+        self._choices['user_ids'] = np.array([f'user_{i}' for i in range(1, 1001)], dtype=object)
+        self._choices['session_ids'] = np.array([f'session_{i}' for i in range(1, 501)], dtype=object)
+        self._choices['product_ids'] = np.array([f'product_{i}' for i in range(1, 1001)], dtype=object)
+        self._choices['page_urls'] = np.array([f'/products/{n}' for n in self.product_names], dtype=object)
+        self._ip_octets = np.array([str(i) for i in range(256)], dtype=object)
 
     def generate_user_event(self, user_id: str = None, session_id: str = None) -> Dict[str, Any]:
         """Generate user event record"""
@@ -86,8 +163,8 @@ class DataGenerator:
             'user_agent': random.choice(self.user_agents),
             'ip_address': f'{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}',
             'location': location,
-            'device_type': random.choice(['desktop', 'mobile', 'tablet']),
-            'referrer': random.choice(['google.com', 'facebook.com', 'direct', 'email', 'twitter.com']),
+            'device_type': random.choice(self.device_types),
+            'referrer': random.choice(self.referrers),
             'page_url': f'/products/{random.choice(self.product_names)}',
             'revenue': round(random.uniform(5.99, 999.99), 2) if event_type == 'purchase' else 0
         }
@@ -102,7 +179,7 @@ class DataGenerator:
             event['review_text'] = f'Great product! Rating: {event["rating"]}/5'
             
         elif event_type == 'purchase':
-            event['payment_method'] = random.choice(['credit_card', 'paypal', 'apple_pay', 'google_pay'])
+            event['payment_method'] = random.choice(self.payment_methods)
             event['discount_applied'] = random.choice([True, False])
             if event['discount_applied']:
                 event['discount_amount'] = round(event['price'] * 0.1, 2)
@@ -165,26 +242,138 @@ class DataGenerator:
             
         return events
 
+    def _choose(self, name: str, count: int) -> List[Any]:
+        """Draw count values of a categorical field in one vectorized call"""
+        values = self._choices[name]
+        idx = self.rng.integers(0, len(values), count)
+        return np.take(values, idx).tolist()
+
+    def _sample_event_numerics(self, count: int) -> Dict[str, np.ndarray]:
+        """Sample the numeric event fields into compact typed arrays"""
+        rng = self.rng
+        return {
+            'prices': rng.uniform(5.99, 999.99, count).round(2),
+            'quantities': rng.integers(1, 11, count, dtype=np.int32),
+            'revenues': rng.uniform(5.99, 999.99, count).round(2),
+            'ips': rng.integers(1, 256, (count, 4), dtype=np.uint8),
+            'offsets': rng.integers(0, 86401, count, dtype=np.int32)
+        }
+
+    def _generate_events(self, count: int, now_us: int) -> List[Dict[str, Any]]:
+        """Generate user event records in bulk from NumPy-sampled columns"""
+        rng = self.rng
+        numerics = self._sample_event_numerics(count)
+        
+        # Event types stay an array so type-dependent fields can be masked
+        types = self._choices['event_types']
+        event_types = np.take(types, rng.integers(0, len(types), count))
+        purchases = event_types == 'purchase'
+        quantities = np.where(purchases | (event_types == 'add_to_cart'), numerics['quantities'], 1)
+        revenues = np.where(purchases, numerics['revenues'].astype(object), 0)
+        
+        # Timestamps within the last 24 hours of the batch's clock read
+        timestamps = _iso_timestamps(now_us - numerics['offsets'].astype(np.int64) * 1_000_000)
+        
+        prices = numerics['prices'].tolist()
+        columns = (
+            _fast_ids(count),
+            self._choose('user_ids', count),
+            self._choose('session_ids', count),
+            timestamps,
+            event_types.tolist(),
+            self._choose('product_ids', count),
+            self._choose('categories', count),
+            prices,
+            quantities.tolist(),
+            repeat('USD', count),
+            self._choose('user_agents', count),
+            ['.'.join(ip) for ip in np.take(self._ip_octets, numerics['ips']).tolist()],
+            self._choose('locations', count),
+            self._choose('device_types', count),
+            self._choose('referrers', count),
+            self._choose('page_urls', count),
+            revenues.tolist()
+        )
+        events = [dict(zip(_EVENT_FIELDS, row)) for row in zip(*columns)]
+        
+        # Add event-specific fields, sampling only the rows that need them
+        searches = np.flatnonzero(event_types == 'search').tolist()
+        for i, query, results_count in zip(searches, self._choose('search_queries', len(searches)),
+                                           rng.integers(0, 1001, len(searches)).tolist()):
+            events[i]['search_query'] = query
+            events[i]['search_results_count'] = results_count
+            
+        reviews = np.flatnonzero(event_types == 'review').tolist()
+        for i, rating in zip(reviews, rng.integers(1, 6, len(reviews)).tolist()):
+            events[i]['rating'] = rating
+            events[i]['review_text'] = f'Great product! Rating: {rating}/5'
+            
+        orders = np.flatnonzero(purchases).tolist()
+        for i, payment_method, discounted in zip(orders, self._choose('payment_methods', len(orders)),
+                                                 (rng.random(len(orders)) < 0.5).tolist()):
+            event = events[i]
+            event['payment_method'] = payment_method
+            event['discount_applied'] = discounted
+            if discounted:
+                event['discount_amount'] = round(prices[i] * 0.1, 2)
+            
+        return events
+
+    def _generate_products(self, count: int, now_us: int) -> List[Dict[str, Any]]:
+        """Generate product records in bulk from NumPy-sampled columns"""
+        rng = self.rng
+        
+        product_ids = self._choose('product_ids', count)
+        product_names = self._choose('product_names', count)
+        categories = self._choose('categories', count)
+        name_suffixes = rng.integers(1, 101, count).tolist()
+        subcategories = rng.integers(1, 6, count).tolist()
+        brands = rng.integers(1, 51, count).tolist()
+        dimensions = rng.uniform(1, 50, (count, 3)).round(2).tolist()
+        age_days = rng.integers(1, 366, count)
+        
+        updated_at = _iso_timestamps(np.array([now_us]))[0]
+        
+        columns = (
+            product_ids,
+            [f'{name.title()} {n}' for name, n in zip(product_names, name_suffixes)],
+            categories,
+            [f'{category}_sub_{n}' for category, n in zip(categories, subcategories)],
+            rng.uniform(5.99, 999.99, count).round(2).tolist(),
+            repeat('USD', count),
+            [f'Brand_{n}' for n in brands],
+            [f'High-quality {name} with excellent features' for name in product_names],
+            [[name, category, 'bestseller', 'new'] for name, category in zip(product_names, categories)],
+            rng.integers(0, 1001, count).tolist(),
+            rng.uniform(0.1, 10.0, count).round(2).tolist(),
+            [dict(zip(_DIMENSION_FIELDS, d)) for d in dimensions],
+            rng.uniform(1, 5, count).round(1).tolist(),
+            rng.integers(0, 1001, count).tolist(),
+            _iso_timestamps(now_us - age_days * 86_400_000_000),
+            repeat(updated_at, count),
+            repeat(True, count),
+            [f'https://example.com/images/{product_id}.jpg' for product_id in product_ids]
+        )
+        return [dict(zip(_PRODUCT_FIELDS, row)) for row in zip(*columns)]
+
     def generate_batch(self, batch_size: int = 100) -> Dict[str, Any]:
         """Generate batch of events and products"""
-        events = []
-        products = []
+        # One clock read timestamps the whole batch
+        now_us = int(time.time() * 1_000_000)
         
         # Generate user events (70% of batch)
         events_count = int(batch_size * 0.7)
-        for _ in range(events_count):
-            events.append(self.generate_user_event())
+        events = self._generate_events(events_count, now_us)
             
         # Generate product data (30% of batch)
         products_count = batch_size - events_count
-        for _ in range(products_count):
-            products.append(self.generate_product_data())
+        products = self._generate_products(products_count, now_us)
             
         return {
             'events': events,
             'products': products,
             'batch_id': str(uuid.uuid4()),
-            'generated_at': datetime.utcnow().isoformat() + 'Z',
+            'generated_at': _iso_timestamps(np.array([now_us]))[0],
             'total_records': len(events) + len(products)
         }
 
@@ -192,21 +381,40 @@ class DataGenerator:
         """Generate and save to file"""
         data = self.generate_batch(batch_size)
         
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
             
         logger.info(f"Generated {data['total_records']} records and saved to {filename}")
         return data
 
+    def stream_batch_to_file(self, filename: str, batch_size: int = 100, chunk_size: int = 1000) -> int:
+        """Generate a batch and stream it to file as NDJSON, one record per line"""
+        events_count = int(batch_size * 0.7)
+        products_count = batch_size - events_count
+        now_us = int(time.time() * 1_000_000)
+        written = 0
+        
+        # Generate in bounded chunks so only chunk_size records are held in memory
+        with open(filename, 'wb') as f:
+            for generate, total in ((self._generate_events, events_count),
+                                    (self._generate_products, products_count)):
+                for start in range(0, total, chunk_size):
+                    for record in generate(min(chunk_size, total - start), now_us):
+                        f.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+                        written += 1
+                        
+        logger.info(f"Streamed {written} records to {filename}")
+        return written
+
     def send_to_lambda(self, lambda_function_name: str, data: Dict[str, Any]):
         """Send data to Lambda function"""
-        lambda_client = boto3.client('lambda')
+        lambda_client = _get_lambda_client()
         
         try:
             response = lambda_client.invoke(
                 FunctionName=lambda_function_name,
                 InvocationType='Event',  # Asynchronous
-                Payload=json.dumps(data)
+                Payload=orjson.dumps(data)
             )
             
             logger.info(f"Sent data to Lambda function {lambda_function_name}")
@@ -216,12 +424,35 @@ class DataGenerator:
             logger.error(f"Error sending data to Lambda: {str(e)}")
             raise
 
+    def send_batch_to_lambda(self, lambda_function_name: str, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send several payloads to a Lambda function concurrently"""
+        lambda_client = _get_lambda_client()
+        
+        def invoke(payload: Dict[str, Any]) -> Dict[str, Any]:
+            return lambda_client.invoke(
+                FunctionName=lambda_function_name,
+                InvocationType='Event',  # Asynchronous
+                Payload=orjson.dumps(payload)
+            )
+        
+        try:
+            # Keep the worker count within the client's connection pool
+            with ThreadPoolExecutor(max_workers=min(32, max(len(payloads), 1))) as executor:
+                responses = list(executor.map(invoke, payloads))
+                
+            logger.info(f"Sent {len(responses)} payloads to Lambda function {lambda_function_name}")
+            return responses
+            
+        except Exception as e:
+            logger.error(f"Error sending data to Lambda: {str(e)}")
+            raise
+
     def send_to_api(self, api_endpoint: str, data: Dict[str, Any]):
         """Send data to API endpoint"""
         try:
-            response = requests.post(
+            response = _SESSION.post(
                 api_endpoint,
-                json=data,
+                data=orjson.dumps(data),
                 headers={'Content-Type': 'application/json'},
                 timeout=30
             )
@@ -241,6 +472,26 @@ def lambda_handler(event, context):
     # Get batch size from event or use default
     batch_size = event.get('batch_size', 100)
     
+    # Fan-out tier: re-invoke this function once per worker id instead of generating
+    if event.get('fanout'):
+        worker_payload = {'batch_size': batch_size}
+        if 'processor_function' in event:
+            worker_payload['processor_function'] = event['processor_function']
+        
+        worker_ids = event.get('ids', [])
+        generator.send_batch_to_lambda(
+            context.function_name,
+            [dict(worker_payload, worker_id=worker_id) for worker_id in worker_ids]
+        )
+        
+        return {
+            'statusCode': 200,
+            'body': orjson.dumps({
+                'message': f'Invoked {len(worker_ids)} generator workers',
+                'worker_ids': worker_ids
+            }).decode()
+        }
+    
     # Generate data
     data = generator.generate_batch(batch_size)
     
@@ -250,11 +501,11 @@ def lambda_handler(event, context):
     
     return {
         'statusCode': 200,
-        'body': json.dumps({
+        'body': orjson.dumps({
             'message': f'Generated {data["total_records"]} records',
             'batch_id': data['batch_id'],
             'generated_at': data['generated_at']
-        })
+        }).decode()
     }
 
 def main():
@@ -270,23 +521,24 @@ def main():
         print("2. Generate user session")
         print("3. Generate product data")
         print("4. Generate batch and save to file")
-        print("5. Exit")
+        print("5. Stream batch to NDJSON file")
+        print("6. Exit")
         
-        choice = input("\nEnter your choice (1-5): ").strip()
+        choice = input("\nEnter your choice (1-6): ").strip()
         
         if choice == '1':
             event = generator.generate_user_event()
-            print(json.dumps(event, indent=2))
+            print(orjson.dumps(event, option=orjson.OPT_INDENT_2).decode())
             
         elif choice == '2':
             events = generator.generate_user_session()
             print(f"Generated {len(events)} events for session:")
             for event in events:
-                print(json.dumps(event, indent=2))
+                print(orjson.dumps(event, option=orjson.OPT_INDENT_2).decode())
                 
         elif choice == '3':
             product = generator.generate_product_data()
-            print(json.dumps(product, indent=2))
+            print(orjson.dumps(product, option=orjson.OPT_INDENT_2).decode())
             
         elif choice == '4':
             batch_size = int(input("Enter batch size (default 100): ") or "100")
@@ -294,6 +546,11 @@ def main():
             generator.generate_and_save_to_file(filename, batch_size)
             
         elif choice == '5':
+            batch_size = int(input("Enter batch size (default 100): ") or "100")
+            filename = input("Enter filename (default: sample_data.ndjson): ") or "sample_data.ndjson"
+            generator.stream_batch_to_file(filename, batch_size)
+            
+        elif choice == '6':
             print("Exiting...")
             break
             
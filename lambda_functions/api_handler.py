@@ -4,73 +4,175 @@ API Handler Lambda Function
 Provides REST API endpoints for accessing cached and search data
 """
 
-import json
 import boto3
+import orjson
 import redis
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, List, Any, Optional
-from opensearchpy import OpenSearch, RequestsHttpConnection
+from opensearchpy import OpenSearch, Urllib3HttpConnection
+from redis.utils import HIREDIS_AVAILABLE
 from botocore.exceptions import ClientError
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Environment configuration, read once during Lambda INIT
+PROJECT_NAME = os.environ.get('PROJECT_NAME', 'opensearch-redis-pipeline')
+ENVIRONMENT = os.environ.get('ENVIRONMENT', 'dev')
+
+# Clients cached at module scope so warm invocations reuse them
+_ssm_client = None
+_secrets_client = None
+_opensearch_client = None
+_redis_client = None
+
+# Process-local TTL cache for search results, checked before Redis
+LOCAL_CACHE_TTL = 60  # seconds
+LOCAL_CACHE_MAX_ENTRIES = 2048
+_local_cache = OrderedDict()  # cache_key -> (expires_at, results)
+_local_cache_lock = threading.Lock()
+
+def _local_cache_get(key: str) -> Optional[Dict[str, Any]]:
+    """Get an unexpired entry from the local cache"""
+    with _local_cache_lock:
+        entry = _local_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del _local_cache[key]
+            return None
+        _local_cache.move_to_end(key)
+        return value
+
+def _local_cache_set(key: str, value: Dict[str, Any]):
+    """Store an entry in the local cache, evicting the least recently used"""
+    with _local_cache_lock:
+        _local_cache[key] = (time.monotonic() + LOCAL_CACHE_TTL, value)
+        _local_cache.move_to_end(key)
+        while len(_local_cache) > LOCAL_CACHE_MAX_ENTRIES:
+            _local_cache.popitem(last=False)
+
+# Connection settings, resolved once per container (during INIT when possible)
+_OS_ENDPOINT = os.environ.get('OPENSEARCH_ENDPOINT')
+_REDIS_ENDPOINT = os.environ.get('REDIS_ENDPOINT')
+_REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
+_REDIS_AUTH = None
+_CONFIG_LOADED = False
+
+def _get_ssm_client():
+    """Get the shared SSM client"""
+    global _ssm_client
+    if _ssm_client is None:
+        _ssm_client = boto3.client('ssm')
+    return _ssm_client
+
+def _get_secrets_client():
+    """Get the shared Secrets Manager client"""
+    global _secrets_client
+    if _secrets_client is None:
+        _secrets_client = boto3.client('secretsmanager')
+    return _secrets_client
+
 class APIHandler:
     """Handle API requests for data access"""
     
     def __init__(self):
-        self.opensearch_client = None
-        self.redis_client = None
-        self.ssm_client = boto3.client('ssm')
-        self.secrets_client = boto3.client('secretsmanager')
+        self.ssm_client = _get_ssm_client()
+        self.secrets_client = _get_secrets_client()
         
-    def get_parameter(self, parameter_name: str) -> str:
-        """Get parameter from SSM Parameter Store"""
+    def get_parameters(self, parameter_names: List[str]) -> Dict[str, str]:
+        """Get several parameters from SSM Parameter Store in one call"""
         try:
-            response = self.ssm_client.get_parameter(
-                Name=parameter_name,
+            response = self.ssm_client.get_parameters(
+                Names=parameter_names,
                 WithDecryption=True
             )
-            return response['Parameter']['Value']
+            return {p['Name']: p['Value'] for p in response['Parameters']}
         except ClientError as e:
-            logger.error(f"Error getting parameter {parameter_name}: {str(e)}")
+            logger.error(f"Error getting parameters {parameter_names}: {str(e)}")
             raise
     
     def get_secret(self, secret_name: str) -> Dict[str, str]:
         """Get secret from AWS Secrets Manager"""
         try:
             response = self.secrets_client.get_secret_value(SecretId=secret_name)
-            return json.loads(response['SecretString'])
+            return orjson.loads(response['SecretString'])
         except ClientError as e:
             logger.error(f"Error getting secret {secret_name}: {str(e)}")
             raise
     
+    def load_connection_config(self):
+        """Resolve endpoints and the Redis auth token into module globals"""
+        global _OS_ENDPOINT, _REDIS_ENDPOINT, _REDIS_PORT, _REDIS_AUTH, _CONFIG_LOADED
+        
+        # Fetch any endpoints not set in the environment with one SSM call
+        prefix = f'/{PROJECT_NAME}/{ENVIRONMENT}'
+        names = []
+        if not _OS_ENDPOINT:
+            names.append(f'{prefix}/opensearch/endpoint')
+        if not _REDIS_ENDPOINT:
+            names.extend([f'{prefix}/redis/endpoint', f'{prefix}/redis/port'])
+        
+        if names:
+            values = self.get_parameters(names)
+            if not _OS_ENDPOINT:
+                _OS_ENDPOINT = values.get(f'{prefix}/opensearch/endpoint')
+            if not _REDIS_ENDPOINT:
+                _REDIS_ENDPOINT = values.get(f'{prefix}/redis/endpoint')
+                _REDIS_PORT = int(values.get(f'{prefix}/redis/port', _REDIS_PORT))
+        
+        # Get auth token if available; only a missing secret means no authentication,
+        # any other failure leaves the config unloaded so the next call retries
+        auth_resolved = True
+        try:
+            secret = self.get_secret(f'{PROJECT_NAME}-{ENVIRONMENT}-redis-auth-token')
+            _REDIS_AUTH = secret.get('auth-token')
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ResourceNotFoundException':
+                logger.warning("No Redis auth token found, connecting without authentication")
+            else:
+                auth_resolved = False
+        except Exception as e:
+            logger.warning(f"Could not fetch Redis auth token: {str(e)}")
+            auth_resolved = False
+        
+        if not (_OS_ENDPOINT and _REDIS_ENDPOINT):
+            logger.warning("Connection endpoints not fully resolved, will retry on next use")
+        
+        _CONFIG_LOADED = auth_resolved and bool(_OS_ENDPOINT) and bool(_REDIS_ENDPOINT)
+    
     def get_opensearch_client(self) -> OpenSearch:
         """Initialize OpenSearch client"""
-        if self.opensearch_client is None:
+        global _opensearch_client
+        if _opensearch_client is None:
             try:
                 # Get OpenSearch endpoint
-                endpoint = os.environ.get('OPENSEARCH_ENDPOINT')
+                if not _CONFIG_LOADED:
+                    self.load_connection_config()
+                endpoint = _OS_ENDPOINT
                 if not endpoint:
-                    project_name = os.environ.get('PROJECT_NAME', 'opensearch-redis-pipeline')
-                    environment = os.environ.get('ENVIRONMENT', 'dev')
-                    endpoint = self.get_parameter(f'/{project_name}/{environment}/opensearch/endpoint')
+                    raise ValueError("OpenSearch endpoint is not configured")
                 
                 # Remove https:// if present
                 if endpoint.startswith('https://'):
                     endpoint = endpoint[8:]
                 
-                self.opensearch_client = OpenSearch(
+                _opensearch_client = OpenSearch(
                     hosts=[{'host': endpoint, 'port': 443}],
                     http_compress=True,
                     use_ssl=True,
                     verify_certs=True,
                     ssl_assert_hostname=False,
                     ssl_show_warn=False,
-                    connection_class=RequestsHttpConnection,
+                    connection_class=Urllib3HttpConnection,
+                    pool_maxsize=25,
                     timeout=30,
                     max_retries=2,
                     retry_on_timeout=True
@@ -82,38 +184,26 @@ class APIHandler:
                 logger.error(f"Error initializing OpenSearch client: {str(e)}")
                 raise
                 
-        return self.opensearch_client
+        return _opensearch_client
     
     def get_redis_client(self) -> redis.Redis:
         """Initialize Redis client"""
-        if self.redis_client is None:
+        global _redis_client
+        if _redis_client is None:
             try:
                 # Get Redis connection details
-                endpoint = os.environ.get('REDIS_ENDPOINT')
-                port = int(os.environ.get('REDIS_PORT', 6379))
-                
+                if not _CONFIG_LOADED:
+                    self.load_connection_config()
+                endpoint = _REDIS_ENDPOINT
+                port = _REDIS_PORT
                 if not endpoint:
-                    project_name = os.environ.get('PROJECT_NAME', 'opensearch-redis-pipeline')
-                    environment = os.environ.get('ENVIRONMENT', 'dev')
-                    endpoint = self.get_parameter(f'/{project_name}/{environment}/redis/endpoint')
-                    port = int(self.get_parameter(f'/{project_name}/{environment}/redis/port'))
+                    raise ValueError("Redis endpoint is not configured")
                 
-                # Get auth token if available
-                auth_token = None
-                try:
-                    project_name = os.environ.get('PROJECT_NAME', 'opensearch-redis-pipeline')
-                    environment = os.environ.get('ENVIRONMENT', 'dev')
-                    secret_name = f'{project_name}-{environment}-redis-auth-token'
-                    secret = self.get_secret(secret_name)
-                    auth_token = secret.get('auth-token')
-                except:
-                    logger.warning("No Redis auth token found, connecting without authentication")
-                
-                # Initialize Redis client
-                self.redis_client = redis.Redis(
+                # Initialize Redis client, sharing it only once it has answered a ping
+                client = redis.Redis(
                     host=endpoint,
                     port=port,
-                    password=auth_token,
+                    password=_REDIS_AUTH,
                     decode_responses=True,
                     ssl=True,
                     ssl_cert_reqs=None,
@@ -123,14 +213,26 @@ class APIHandler:
                 )
                 
                 # Test connection
-                self.redis_client.ping()
+                client.ping()
+                _redis_client = client
                 logger.info(f"Redis client initialized for endpoint: {endpoint}:{port}")
                 
+                # redis-py picks the hiredis C parser automatically when it is installed
+                if not HIREDIS_AVAILABLE:
+                    logger.warning("hiredis not installed, using the pure-Python Redis response parser")
+                
             except Exception as e:
                 logger.error(f"Error initializing Redis client: {str(e)}")
                 raise
                 
-        return self.redis_client
+        return _redis_client
+
+# Prefetch connection settings during the Lambda INIT phase
+if os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
+    try:
+        APIHandler().load_connection_config()
+    except Exception as e:
+        logger.warning(f"Deferring connection config lookup: {str(e)}")
 
 def lambda_handler(event, context):
     """Lambda handler for API requests"""
@@ -174,7 +276,31 @@ def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
             'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
             'Access-Control-Allow-Methods': 'GET,POST,OPTIONS'
         },
-        'body': json.dumps(body)
+        'body': orjson.dumps(body).decode()
+    }
+
+# Static parts of the search request bodies, built once per container
+_MATCH_ALL_QUERY = {"match_all": {}}
+_MATCH_ALL_SORT = [{"timestamp": {"order": "desc"}}]
+_MULTI_MATCH_FIELDS = ["name^2", "description", "category", "search_query", "event_type"]
+_MULTI_MATCH_SORT = [{"_score": {"order": "desc"}}, {"timestamp": {"order": "desc"}}]
+
+def _build_search_body(query: str, size: int) -> Dict[str, Any]:
+    """Build an OpenSearch request body around the shared static parts"""
+    if query == '*':
+        return {"query": _MATCH_ALL_QUERY, "size": size, "sort": _MATCH_ALL_SORT}
+    
+    return {
+        "query": {
+            "multi_match": {
+                "query": query,
+                "fields": _MULTI_MATCH_FIELDS,
+                "type": "best_fields",
+                "fuzziness": "AUTO"
+            }
+        },
+        "size": size,
+        "sort": _MULTI_MATCH_SORT
     }
 
 def handle_search(api_handler: APIHandler, query_params: Dict[str, str]) -> Dict[str, Any]:
@@ -186,42 +312,30 @@ def handle_search(api_handler: APIHandler, query_params: Dict[str, str]) -> Dict
     index = query_params.get('index', 'user-events')
     size = min(int(query_params.get('size', 10)), 100)  # Max 100 results
     
-    # Check cache first
+    # Check the in-process cache, then Redis
     cache_key = f"search_cache:{index}:{query}:{size}"
-    try:
-        cached_result = redis_client.get(cache_key)
-        if cached_result:
-            logger.info(f"Returning cached search result for query: {query}")
-            return create_response(200, {
-                'query': query,
-                'index': index,
-                'cached': True,
-                'results': json.loads(cached_result)
-            })
-    except Exception as e:
-        logger.warning(f"Cache lookup failed: {str(e)}")
+    cached_result = _local_cache_get(cache_key)
+    if cached_result is None:
+        try:
+            cached_value = redis_client.get(cache_key)
+            if cached_value:
+                cached_result = orjson.loads(cached_value)
+                _local_cache_set(cache_key, cached_result)
+        except Exception as e:
+            logger.warning(f"Cache lookup failed: {str(e)}")
+    
+    if cached_result is not None:
+        logger.info(f"Returning cached search result for query: {query}")
+        return create_response(200, {
+            'query': query,
+            'index': index,
+            'cached': True,
+            'results': cached_result
+        })
     
     try:
         # Build OpenSearch query
-        if query == '*':
-            search_body = {
-                "query": {"match_all": {}},
-                "size": size,
-                "sort": [{"timestamp": {"order": "desc"}}]
-            }
-        else:
-            search_body = {
-                "query": {
-                    "multi_match": {
-                        "query": query,
-                        "fields": ["name^2", "description", "category", "search_query", "event_type"],
-                        "type": "best_fields",
-                        "fuzziness": "AUTO"
-                    }
-                },
-                "size": size,
-                "sort": [{"_score": {"order": "desc"}}, {"timestamp": {"order": "desc"}}]
-            }
+        search_body = _build_search_body(query, size)
         
         # Execute search
         response = opensearch_client.search(index=index, body=search_body)
@@ -233,9 +347,10 @@ def handle_search(api_handler: APIHandler, query_params: Dict[str, str]) -> Dict
             'max_score': response['hits']['max_score']
         }
         
-        # Cache result for 5 minutes
+        # Cache result locally and for 5 minutes in Redis
+        _local_cache_set(cache_key, results)
         try:
-            redis_client.setex(cache_key, 300, json.dumps(results))
+            redis_client.setex(cache_key, 300, orjson.dumps(results))
         except Exception as e:
             logger.warning(f"Failed to cache search result: {str(e)}")
         
@@ -264,10 +379,13 @@ def handle_cache_lookup(api_handler: APIHandler, query_params: Dict[str, str]) -
     
     try:
         if key:
-            # Direct key lookup
-            if redis_client.exists(key):
-                key_type = redis_client.type(key)
-                
+            # Direct key lookup, resolving type and TTL in one round trip
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.type(key)
+            pipe.ttl(key)
+            key_type, ttl = pipe.execute()
+            
+            if key_type != 'none':
                 if key_type == 'string':
                     value = redis_client.get(key)
                 elif key_type == 'hash':
@@ -281,8 +399,6 @@ def handle_cache_lookup(api_handler: APIHandler, query_params: Dict[str, str]) -
                 else:
                     value = f"Unsupported type: {key_type}"
                 
-                ttl = redis_client.ttl(key)
-                
                 return create_response(200, {
                     'key': key,
                     'type': key_type,
@@ -293,22 +409,36 @@ def handle_cache_lookup(api_handler: APIHandler, query_params: Dict[str, str]) -
                 return create_response(404, {'error': f'Key not found: {key}'})
         
         elif pattern:
-            # Pattern search
-            keys = redis_client.keys(pattern)
-            if len(keys) > 100:  # Limit results
-                keys = keys[:100]
-                
-            results = {}
+            # Pattern search with incremental SCAN instead of a blocking KEYS
+            keys = []
+            for k in redis_client.scan_iter(match=pattern, count=500):
+                keys.append(k)
+                if len(keys) >= 100:  # Limit results
+                    break
+            
+            # Resolve all key types in one round trip
+            pipe = redis_client.pipeline(transaction=False)
             for k in keys:
-                try:
-                    key_type = redis_client.type(k)
-                    if key_type == 'string':
-                        results[k] = redis_client.get(k)
-                    elif key_type == 'hash':
-                        results[k] = redis_client.hgetall(k)
-                    # Add other types as needed
-                except Exception as e:
-                    results[k] = f"Error: {str(e)}"
+                pipe.type(k)
+            key_types = pipe.execute(raise_on_error=False)
+            
+            # Fetch all supported values in a second round trip
+            results = {}
+            fetched_keys = []
+            for k, key_type in zip(keys, key_types):
+                if isinstance(key_type, Exception):
+                    results[k] = f"Error: {str(key_type)}"
+                elif key_type == 'string':
+                    pipe.get(k)
+                    fetched_keys.append(k)
+                elif key_type == 'hash':
+                    pipe.hgetall(k)
+                    fetched_keys.append(k)
+                # Add other types as needed
+            
+            values = pipe.execute(raise_on_error=False)
+            for k, value in zip(fetched_keys, values):
+                results[k] = f"Error: {str(value)}" if isinstance(value, Exception) else value
             
             return create_response(200, {
                 'pattern': pattern,
@@ -358,21 +488,26 @@ def handle_analytics(api_handler: APIHandler, query_params: Dict[str, str]) -> D
     
     try:
         today = datetime.utcnow().strftime('%Y-%m-%d')
+        event_types = ['view', 'click', 'purchase', 'search', 'add_to_cart']
+        
+        # Fetch rankings and counters in a single round trip
+        pipe = redis_client.pipeline(transaction=False)
         
-        # Get popular products
-        popular_products = redis_client.zrevrange('popular_products', 0, 9, withscores=True)
+        # Popular products
+        pipe.zrevrange('popular_products', 0, 9, withscores=True)
         
-        # Get search queries
+        # Search queries
         search_queries_key = f"search_queries:{today}"
-        popular_searches = redis_client.zrevrange(search_queries_key, 0, 9, withscores=True)
+        pipe.zrevrange(search_queries_key, 0, 9, withscores=True)
         
-        # Get event counters
-        event_types = ['view', 'click', 'purchase', 'search', 'add_to_cart']
-        event_counts = {}
-        for event_type in event_types:
-            counter_key = f"counters:{today}:{event_type}"
-            count = redis_client.get(counter_key) or 0
-            event_counts[event_type] = int(count)
+        # Event counters
+        pipe.mget([f"counters:{today}:{event_type}" for event_type in event_types])
+        
+        popular_products, popular_searches, counts = pipe.execute()
+        event_counts = {
+            event_type: int(count or 0)
+            for event_type, count in zip(event_types, counts)
+        }
         
         return create_response(200, {
             'date': today,
@@ -394,8 +529,8 @@ def handle_metrics(api_handler: APIHandler, query_params: Dict[str, str]) -> Dic
         # Redis info
         redis_info = redis_client.info()
         
-        # Key statistics
-        total_keys = len(redis_client.keys('*'))
+        # Key statistics from the keyspace section rather than a full KEYS scan
+        total_keys = redis_info.get('db0', {}).get('keys', 0)
         
         metrics = {
             'redis': {
@@ -4,46 +4,242 @@ Data Processor Lambda Function
 Processes data from generator and stores in Redis/OpenSearch
 """
 
-import json
 import boto3
+import orjson
 import redis
 import logging
 import os
+import socket
+import ssl
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any, Optional
-from opensearchpy import OpenSearch, RequestsHttpConnection
+from operator import itemgetter
+from typing import Dict, List, Any, Optional, Tuple
+from opensearchpy import OpenSearch, Urllib3HttpConnection
+from opensearchpy.helpers import bulk as os_bulk
 from botocore.exceptions import ClientError
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Clients cached at module scope so warm invocations reuse them
+_ssm_client = None
+_secrets_client = None
+
+def _get_ssm_client():
+    """Get the shared SSM client"""
+    global _ssm_client
+    if _ssm_client is None:
+        _ssm_client = boto3.client('ssm')
+    return _ssm_client
+
+def _get_secrets_client():
+    """Get the shared Secrets Manager client"""
+    global _secrets_client
+    if _secrets_client is None:
+        _secrets_client = boto3.client('secretsmanager')
+    return _secrets_client
+
+# In-process caches for SSM parameters and secrets: name -> (fetched_at, value)
+PARAMETER_CACHE_TTL = int(os.environ.get('PARAMETER_CACHE_TTL', 300))  # seconds
+_SSM_CACHE: Dict[str, Tuple[float, str]] = {}
+_SECRET_CACHE: Dict[str, Tuple[float, Dict[str, str]]] = {}
+
+# Redis connection pool shared across warm invocations; Lambda handles one
+# event at a time, so a single kept-alive TLS connection is enough
+_REDIS_POOL: Optional[redis.ConnectionPool] = None
+_REDIS_PINGED = False
+_REDIS_KEEPALIVE_OPTIONS = {
+    socket.TCP_KEEPIDLE: 60,
+    socket.TCP_KEEPINTVL: 30,
+    socket.TCP_KEEPCNT: 3
+}
+
+# Required event fields read together in one C-level call
+_EVENT_KEYS = itemgetter('user_id', 'session_id', 'event_type')
+
+# Redis hash fields cached per event: (hash field, event key, default);
+# a None default marks the key as required
+_SESSION_FIELDS = (
+    ('user_id', 'user_id', None),
+    ('last_activity', 'timestamp', None),
+    ('last_event', 'event_type', None),
+    ('device_type', 'device_type', 'unknown')
+)
+_USER_FIELDS = (
+    ('last_activity', 'timestamp', None),
+    ('last_event', 'event_type', None),
+    ('current_session', 'session_id', None)
+)
+
+# Fields every incoming record must carry to be cached and indexed
+_REQUIRED_EVENT_KEYS = frozenset(('id', 'user_id', 'session_id', 'timestamp', 'event_type'))
+_REQUIRED_PRODUCT_KEYS = frozenset(('id', 'name', 'category', 'price', 'brand'))
+# Optional event fields that are cached or used as sorted-set members when present
+_OPTIONAL_EVENT_KEYS = ('device_type', 'product_id', 'search_query')
+
+def _is_scalar(value: Any) -> bool:
+    """Check that Redis accepts a value as-is; redis-py rejects None and bools"""
+    return isinstance(value, (str, int, float)) and not isinstance(value, bool)
+
+def _valid_event(event: Any) -> bool:
+    """Check that an event carries every required field and only scalars where Redis stores them"""
+    return (isinstance(event, dict) and _REQUIRED_EVENT_KEYS <= event.keys()
+            and all(_is_scalar(event[key]) for key in _REQUIRED_EVENT_KEYS)
+            and all(_is_scalar(event[key]) for key in _OPTIONAL_EVENT_KEYS if key in event))
+
+def _valid_product(product: Any) -> bool:
+    """Check that a product carries every required field as a scalar"""
+    return (isinstance(product, dict) and _REQUIRED_PRODUCT_KEYS <= product.keys()
+            and all(_is_scalar(product[key]) for key in _REQUIRED_PRODUCT_KEYS)
+            and isinstance(product['name'], str))
+
+def _expire_once(pipe: redis.client.Pipeline, expired: set, key: str, ttl: int):
+    """Queue EXPIRE for a key unless it was already queued in this batch"""
+    if key not in expired:
+        pipe.expire(key, ttl)
+        expired.add(key)
+
+# TLS context shared by every OpenSearch connection so the CA bundle is
+# loaded once per container rather than on each new connection
+_OPENSEARCH_SSL_CONTEXT = ssl.create_default_context(
+    cafile=Urllib3HttpConnection.default_ca_certs()
+)
+
+# OpenSearch index mappings
+USER_EVENTS_MAPPING = {
+    "mappings": {
+        "properties": {
+            "id": {"type": "keyword"},
+            "user_id": {"type": "keyword"},
+            "session_id": {"type": "keyword"},
+            "timestamp": {"type": "date"},
+            "event_type": {"type": "keyword"},
+            "product_id": {"type": "keyword"},
+            "category": {"type": "keyword"},
+            "price": {"type": "double"},
+            "quantity": {"type": "integer"},
+            "currency": {"type": "keyword"},
+            "user_agent": {"type": "text"},
+            "ip_address": {"type": "ip"},
+            "location": {
+                "properties": {
+                    "city": {"type": "keyword"},
+                    "state": {"type": "keyword"},
+                    "country": {"type": "keyword"}
+                }
+            },
+            "device_type": {"type": "keyword"},
+            "referrer": {"type": "keyword"},
+            "page_url": {"type": "keyword"},
+            "revenue": {"type": "double"},
+            "search_query": {"type": "text"},
+            "search_results_count": {"type": "integer"},
+            "rating": {"type": "integer"},
+            "review_text": {"type": "text"},
+            "payment_method": {"type": "keyword"},
+            "discount_applied": {"type": "boolean"},
+            "discount_amount": {"type": "double"}
+        }
+    }
+}
+
+PRODUCT_CATALOG_MAPPING = {
+    "mappings": {
+        "properties": {
+            "id": {"type": "keyword"},
+            "name": {"type": "text"},
+            "category": {"type": "keyword"},
+            "subcategory": {"type": "keyword"},
+            "price": {"type": "double"},
+            "currency": {"type": "keyword"},
+            "brand": {"type": "keyword"},
+            "description": {"type": "text"},
+            "tags": {"type": "keyword"},
+            "stock_quantity": {"type": "integer"},
+            "weight": {"type": "double"},
+            "dimensions": {
+                "properties": {
+                    "length": {"type": "double"},
+                    "width": {"type": "double"},
+                    "height": {"type": "double"}
+                }
+            },
+            "rating": {"type": "double"},
+            "review_count": {"type": "integer"},
+            "created_at": {"type": "date"},
+            "updated_at": {"type": "date"},
+            "is_active": {"type": "boolean"},
+            "image_url": {"type": "keyword"}
+        }
+    }
+}
+
+# OpenSearch bulk request sizing
+BULK_CHUNK_SIZE = 500
+BULK_MAX_CHUNK_BYTES = 10 * 1024 * 1024
+
+# Overlap the Redis pipeline flush with the OpenSearch bulk request;
+# set PARALLEL_WRITES=false to run them one after the other
+PARALLEL_WRITES = os.environ.get('PARALLEL_WRITES', 'true').lower() == 'true'
+_WRITE_EXECUTOR = ThreadPoolExecutor(max_workers=1) if PARALLEL_WRITES else None
+
+def _action_expander(index_name: str):
+    """Build a bulk expand callback that renders the NDJSON lines directly"""
+    action_tmpl = '{"index":{"_index":"%s","_id":%%s}}' % index_name
+    
+    def expand(doc: Dict[str, Any]) -> Tuple[str, str]:
+        return action_tmpl % orjson.dumps(doc['id']).decode(), orjson.dumps(doc).decode()
+    
+    return expand
+
+# Pre-rendered bulk action templates per index
+_ACTION_EXPANDERS = {
+    index_name: _action_expander(index_name)
+    for index_name in ('user-events', 'product-catalog')
+}
+
 class DataProcessor:
     """Process and store data in Redis and OpenSearch"""
     
     def __init__(self):
         self.opensearch_client = None
         self.redis_client = None
-        self.ssm_client = boto3.client('ssm')
-        self.secrets_client = boto3.client('secretsmanager')
+        self.ssm_client = _get_ssm_client()
+        self.secrets_client = _get_secrets_client()
         
     def get_parameter(self, parameter_name: str) -> str:
         """Get parameter from SSM Parameter Store"""
+        cached = _SSM_CACHE.get(parameter_name)
+        if cached and time.time() - cached[0] < PARAMETER_CACHE_TTL:
+            return cached[1]
+        
         try:
             response = self.ssm_client.get_parameter(
                 Name=parameter_name,
                 WithDecryption=True
             )
-            return response['Parameter']['Value']
+            value = response['Parameter']['Value']
+            _SSM_CACHE[parameter_name] = (time.time(), value)
+            return value
         except ClientError as e:
             logger.error(f"Error getting parameter {parameter_name}: {str(e)}")
             raise
     
     def get_secret(self, secret_name: str) -> Dict[str, str]:
         """Get secret from AWS Secrets Manager"""
+        cached = _SECRET_CACHE.get(secret_name)
+        if cached and time.time() - cached[0] < PARAMETER_CACHE_TTL:
+            return cached[1]
+        
         try:
             response = self.secrets_client.get_secret_value(SecretId=secret_name)
-            return json.loads(response['SecretString'])
+            secret = orjson.loads(response['SecretString'])
+            _SECRET_CACHE[secret_name] = (time.time(), secret)
+            return secret
         except ClientError as e:
             logger.error(f"Error getting secret {secret_name}: {str(e)}")
             raise
@@ -67,10 +263,9 @@ class DataProcessor:
                     hosts=[{'host': endpoint, 'port': 443}],
                     http_compress=True,
                     use_ssl=True,
-                    verify_certs=True,
-                    ssl_assert_hostname=False,
-                    ssl_show_warn=False,
-                    connection_class=RequestsHttpConnection,
+                    ssl_context=_OPENSEARCH_SSL_CONTEXT,
+                    connection_class=Urllib3HttpConnection,
+                    pool_maxsize=10,
                     timeout=60,
                     max_retries=3,
                     retry_on_timeout=True
@@ -86,46 +281,70 @@ class DataProcessor:
     
     def get_redis_client(self) -> redis.Redis:
         """Initialize Redis client"""
+        global _REDIS_POOL, _REDIS_PINGED
         if self.redis_client is None:
             try:
-                # Get Redis connection details
-                endpoint = os.environ.get('REDIS_ENDPOINT')
-                port = int(os.environ.get('REDIS_PORT', 6379))
+                pool = _REDIS_POOL
+                cache_pool = False
+                if pool is None:
+                    # Get Redis connection details
+                    endpoint = os.environ.get('REDIS_ENDPOINT')
+                    port = int(os.environ.get('REDIS_PORT', 6379))
+                    
+                    if not endpoint:
+                        project_name = os.environ.get('PROJECT_NAME', 'opensearch-redis-pipeline')
+                        environment = os.environ.get('ENVIRONMENT', 'dev')
+                        endpoint = self.get_parameter(f'/{project_name}/{environment}/redis/endpoint')
+                        port = int(self.get_parameter(f'/{project_name}/{environment}/redis/port'))
+                    
+                    # Get auth token if available; only a missing secret means no authentication
+                    auth_token = None
+                    auth_resolved = True
+                    try:
+                        project_name = os.environ.get('PROJECT_NAME', 'opensearch-redis-pipeline')
+                        environment = os.environ.get('ENVIRONMENT', 'dev')
+                        secret_name = f'{project_name}-{environment}-redis-auth-token'
+                        secret = self.get_secret(secret_name)
+                        auth_token = secret.get('auth-token')
+                    except ClientError as e:
+                        if e.response['Error']['Code'] == 'ResourceNotFoundException':
+                            logger.warning("No Redis auth token found, connecting without authentication")
+                        else:
+                            auth_resolved = False
+                    except Exception as e:
+                        logger.warning(f"Could not fetch Redis auth token: {str(e)}")
+                        auth_resolved = False
+                    
+                    pool = redis.ConnectionPool(
+                        connection_class=redis.SSLConnection,
+                        max_connections=1,
+                        host=endpoint,
+                        port=port,
+                        password=auth_token,
+                        # Write-only path: replies are never read, so skip decoding
+                        decode_responses=False,
+                        ssl_cert_reqs=None,
+                        socket_connect_timeout=10,
+                        socket_timeout=10,
+                        socket_keepalive=True,
+                        socket_keepalive_options=_REDIS_KEEPALIVE_OPTIONS,
+                        retry_on_timeout=True,
+                        health_check_interval=30
+                    )
+                    # A pool built after a failed secret lookup is not kept for later invocations
+                    cache_pool = auth_resolved
+                    logger.info(f"Redis connection pool created for endpoint: {endpoint}:{port}")
                 
-                if not endpoint:
-                    project_name = os.environ.get('PROJECT_NAME', 'opensearch-redis-pipeline')
-                    environment = os.environ.get('ENVIRONMENT', 'dev')
-                    endpoint = self.get_parameter(f'/{project_name}/{environment}/redis/endpoint')
-                    port = int(self.get_parameter(f'/{project_name}/{environment}/redis/port'))
+                client = redis.Redis(connection_pool=pool)
                 
-                # Get auth token if available
-                auth_token = None
-                try:
-                    project_name = os.environ.get('PROJECT_NAME', 'opensearch-redis-pipeline')
-                    environment = os.environ.get('ENVIRONMENT', 'dev')
-                    secret_name = f'{project_name}-{environment}-redis-auth-token'
-                    secret = self.get_secret(secret_name)
-                    auth_token = secret.get('auth-token')
-                except:
-                    logger.warning("No Redis auth token found, connecting without authentication")
-                
-                # Initialize Redis client
-                self.redis_client = redis.Redis(
-                    host=endpoint,
-                    port=port,
-                    password=auth_token,
-                    decode_responses=True,
-                    ssl=True,
-                    ssl_cert_reqs=None,
-                    socket_connect_timeout=10,
-                    socket_timeout=10,
-                    retry_on_timeout=True,
-                    health_check_interval=30
-                )
+                # Test connection once per container, publishing the pool only once it answers
+                if pool is not _REDIS_POOL or not _REDIS_PINGED:
+                    client.ping()
+                if cache_pool:
+                    _REDIS_POOL = pool
+                    _REDIS_PINGED = True
                 
-                # Test connection
-                self.redis_client.ping()
-                logger.info(f"Redis client initialized for endpoint: {endpoint}:{port}")
+                self.redis_client = client
                 
             except Exception as e:
                 logger.error(f"Error initializing Redis client: {str(e)}")
@@ -137,80 +356,10 @@ class DataProcessor:
         """Create OpenSearch indices if they don't exist"""
         opensearch_client = self.get_opensearch_client()
         
-        # User events index
-        user_events_mapping = {
-            "mappings": {
-                "properties": {
-                    "id": {"type": "keyword"},
-                    "user_id": {"type": "keyword"},
-                    "session_id": {"type": "keyword"},
-                    "timestamp": {"type": "date"},
-                    "event_type": {"type": "keyword"},
-                    "product_id": {"type": "keyword"},
-                    "category": {"type": "keyword"},
-                    "price": {"type": "double"},
-                    "quantity": {"type": "integer"},
-                    "currency": {"type": "keyword"},
-                    "user_agent": {"type": "text"},
-                    "ip_address": {"type": "ip"},
-                    "location": {
-                        "properties": {
-                            "city": {"type": "keyword"},
-                            "state": {"type": "keyword"},
-                            "country": {"type": "keyword"}
-                        }
-                    },
-                    "device_type": {"type": "keyword"},
-                    "referrer": {"type": "keyword"},
-                    "page_url": {"type": "keyword"},
-                    "revenue": {"type": "double"},
-                    "search_query": {"type": "text"},
-                    "search_results_count": {"type": "integer"},
-                    "rating": {"type": "integer"},
-                    "review_text": {"type": "text"},
-                    "payment_method": {"type": "keyword"},
-                    "discount_applied": {"type": "boolean"},
-                    "discount_amount": {"type": "double"}
-                }
-            }
-        }
-        
-        # Product catalog index
-        product_catalog_mapping = {
-            "mappings": {
-                "properties": {
-                    "id": {"type": "keyword"},
-                    "name": {"type": "text"},
-                    "category": {"type": "keyword"},
-                    "subcategory": {"type": "keyword"},
-                    "price": {"type": "double"},
-                    "currency": {"type": "keyword"},
-                    "brand": {"type": "keyword"},
-                    "description": {"type": "text"},
-                    "tags": {"type": "keyword"},
-                    "stock_quantity": {"type": "integer"},
-                    "weight": {"type": "double"},
-                    "dimensions": {
-                        "properties": {
-                            "length": {"type": "double"},
-                            "width": {"type": "double"},
-                            "height": {"type": "double"}
-                        }
-                    },
-                    "rating": {"type": "double"},
-                    "review_count": {"type": "integer"},
-                    "created_at": {"type": "date"},
-                    "updated_at": {"type": "date"},
-                    "is_active": {"type": "boolean"},
-                    "image_url": {"type": "keyword"}
-                }
-            }
-        }
-        
         # Create indices
         indices = [
-            ('user-events', user_events_mapping),
-            ('product-catalog', product_catalog_mapping)
+            ('user-events', USER_EVENTS_MAPPING),
+            ('product-catalog', PRODUCT_CATALOG_MAPPING)
         ]
         
         for index_name, mapping in indices:
@@ -229,141 +378,160 @@ class DataProcessor:
     
     def process_user_events(self, events: List[Dict[str, Any]]) -> int:
         """Process user events and store in Redis and OpenSearch"""
-        opensearch_client = self.get_opensearch_client()
+        if not events:
+            return 0
+        
         redis_client = self.get_redis_client()
+        # Queue every Redis write and flush them in a single round trip
+        pipe = redis_client.pipeline(transaction=False)
         
-        processed_count = 0
-        bulk_actions = []
+        valid_events = [event for event in events if _valid_event(event)]
+        skipped = len(events) - len(valid_events)
+        if skipped:
+            logger.warning(f"Skipped {skipped} invalid events")
         
-        for event in events:
-            try:
-                # Store in Redis (hot data cache)
-                self.cache_user_data(redis_client, event)
-                
-                # Prepare for OpenSearch bulk insert
-                bulk_actions.append({
-                    "index": {
-                        "_index": "user-events",
-                        "_id": event['id']
-                    }
-                })
-                bulk_actions.append(event)
-                
-                processed_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error processing event {event.get('id')}: {str(e)}")
-                continue
+        # Date bucket for counters, fixed for the whole batch
+        today = datetime.utcnow().strftime('%Y-%m-%d')
+        # Last event seen per session and per user; only the final state is cached
+        session_events = {}
+        user_events = {}
+        # Counter increments aggregated across the batch
+        event_counts = Counter()
+        product_pop = Counter()
+        search_counts = Counter()
         
-        # Bulk insert to OpenSearch
-        if bulk_actions:
-            try:
-                response = opensearch_client.bulk(body=bulk_actions)
-                if response.get('errors'):
-                    logger.warning(f"Some documents failed to index: {response}")
-                else:
-                    logger.info(f"Successfully indexed {len(bulk_actions)//2} events to OpenSearch")
-            except Exception as e:
-                logger.error(f"Error bulk indexing events: {str(e)}")
-                raise
+        for event in valid_events:
+            user_id, session_id, event_type = _EVENT_KEYS(event)
+            session_events[session_id] = event
+            user_events[user_id] = event
+            
+            event_counts[event_type] += 1
+            if 'product_id' in event:
+                product_pop[event['product_id']] += 1
+            if event_type == 'search' and 'search_query' in event:
+                search_counts[event['search_query']] += 1
+        
+        # Store in Redis (hot data cache)
+        self.cache_user_data(pipe, session_events, user_events)
+        self.cache_counters(pipe, today, event_counts, product_pop, search_counts)
+        self._write_batch(pipe, 'user-events', valid_events, 'events')
         
-        return processed_count
+        return len(valid_events)
     
     def process_products(self, products: List[Dict[str, Any]]) -> int:
         """Process product data and store in Redis and OpenSearch"""
-        opensearch_client = self.get_opensearch_client()
+        if not products:
+            return 0
+        
         redis_client = self.get_redis_client()
+        # Queue every Redis write and flush them in a single round trip
+        pipe = redis_client.pipeline(transaction=False)
         
-        processed_count = 0
-        bulk_actions = []
+        valid_products = [product for product in products if _valid_product(product)]
+        skipped = len(products) - len(valid_products)
+        if skipped:
+            logger.warning(f"Skipped {skipped} invalid products")
         
-        for product in products:
-            try:
-                # Store in Redis (product cache)
-                self.cache_product_data(redis_client, product)
-                
-                # Prepare for OpenSearch bulk insert
-                bulk_actions.append({
-                    "index": {
-                        "_index": "product-catalog",
-                        "_id": product['id']
-                    }
-                })
-                bulk_actions.append(product)
-                
-                processed_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error processing product {product.get('id')}: {str(e)}")
-                continue
+        # Keys whose TTL has already been queued in this batch
+        expired = set()
         
-        # Bulk insert to OpenSearch
-        if bulk_actions:
-            try:
-                response = opensearch_client.bulk(body=bulk_actions)
-                if response.get('errors'):
-                    logger.warning(f"Some products failed to index: {response}")
-                else:
-                    logger.info(f"Successfully indexed {len(bulk_actions)//2} products to OpenSearch")
-            except Exception as e:
-                logger.error(f"Error bulk indexing products: {str(e)}")
-                raise
+        for product in valid_products:
+            # Store in Redis (product cache)
+            self.cache_product_data(pipe, product, expired)
         
-        return processed_count
+        self._write_batch(pipe, 'product-catalog', valid_products, 'products')
+        
+        return len(valid_products)
     
-    def cache_user_data(self, redis_client: redis.Redis, event: Dict[str, Any]):
-        """Cache user data in Redis"""
-        user_id = event['user_id']
-        session_id = event['session_id']
+    def _write_batch(self, pipe: redis.client.Pipeline, index_name: str,
+                     docs: List[Dict[str, Any]], label: str):
+        """Flush queued Redis writes and bulk index documents into OpenSearch"""
+        opensearch_client = self.get_opensearch_client()
         
-        # Cache user session data
-        session_key = f"session:{session_id}"
-        redis_client.hset(session_key, mapping={
-            'user_id': user_id,
-            'last_activity': event['timestamp'],
-            'last_event': event['event_type'],
-            'device_type': event.get('device_type', 'unknown'),
-            'location': json.dumps(event.get('location', {}))
-        })
-        redis_client.expire(session_key, 3600)  # 1 hour TTL
+        redis_future = _WRITE_EXECUTOR.submit(pipe.execute) if _WRITE_EXECUTOR else None
+        if redis_future is None:
+            pipe.execute()
         
-        # Cache user activity
-        user_key = f"user:{user_id}"
-        redis_client.hset(user_key, mapping={
-            'last_activity': event['timestamp'],
-            'last_event': event['event_type'],
-            'current_session': session_id
-        })
-        redis_client.expire(user_key, 86400)  # 24 hours TTL
+        try:
+            # Stream to OpenSearch in size-bounded bulk chunks
+            if docs:
+                try:
+                    success, errors = os_bulk(
+                        opensearch_client,
+                        docs,
+                        expand_action_callback=_ACTION_EXPANDERS[index_name],
+                        chunk_size=BULK_CHUNK_SIZE,
+                        max_chunk_bytes=BULK_MAX_CHUNK_BYTES,
+                        raise_on_error=False,
+                        request_timeout=60
+                    )
+                    if errors:
+                        logger.warning(f"{len(errors)} {label} failed to index: {errors[:5]}")
+                    else:
+                        logger.info(f"Successfully indexed {success} {label} to OpenSearch")
+                except Exception as e:
+                    logger.error(f"Error bulk indexing {label}: {str(e)}")
+                    raise
+        except BaseException:
+            # Wait for the Redis flush, but keep the indexing error as the one raised
+            if redis_future is not None:
+                try:
+                    redis_future.result()
+                except Exception as e:
+                    logger.error(f"Error flushing Redis pipeline for {label}: {str(e)}")
+            raise
         
-        # Update event counters
-        event_type = event['event_type']
-        today = datetime.utcnow().strftime('%Y-%m-%d')
+        if redis_future is not None:
+            redis_future.result()
+    
+    def cache_user_data(self, pipe: redis.client.Pipeline, session_events: Dict[str, Dict[str, Any]],
+                        user_events: Dict[str, Dict[str, Any]]):
+        """Queue the latest session and user state from a batch on a Redis pipeline"""
+        # Cache user session data
+        for session_id, event in session_events.items():
+            session_key = f"session:{session_id}"
+            session_data = {field: event[key] if default is None else event.get(key, default)
+                            for field, key, default in _SESSION_FIELDS}
+            session_data['location'] = orjson.dumps(event.get('location', {}))
+            pipe.hset(session_key, mapping=session_data)
+            pipe.expire(session_key, 3600)  # 1 hour TTL
         
+        # Cache user activity
+        for user_id, event in user_events.items():
+            user_key = f"user:{user_id}"
+            pipe.hset(user_key, mapping={field: event[key] if default is None else event.get(key, default)
+                                         for field, key, default in _USER_FIELDS})
+            pipe.expire(user_key, 86400)  # 24 hours TTL
+    
+    def cache_counters(self, pipe: redis.client.Pipeline, today: str, event_counts: Counter,
+                       product_pop: Counter, search_counts: Counter):
+        """Queue aggregated batch counters on a Redis pipeline"""
         # Daily event counters
-        counter_key = f"counters:{today}:{event_type}"
-        redis_client.incr(counter_key)
-        redis_client.expire(counter_key, 86400 * 7)  # 7 days TTL
+        for event_type, count in event_counts.items():
+            counter_key = f"counters:{today}:{event_type}"
+            pipe.incrby(counter_key, count)
+            pipe.expire(counter_key, 86400 * 7)  # 7 days TTL
         
         # Product popularity counters
-        if 'product_id' in event:
-            product_key = f"product_popularity:{event['product_id']}"
-            redis_client.zincrby('popular_products', 1, event['product_id'])
-            redis_client.expire('popular_products', 86400)  # 24 hours TTL
+        if product_pop:
+            for product_id, count in product_pop.items():
+                pipe.zincrby('popular_products', count, product_id)
+            pipe.expire('popular_products', 86400)  # 24 hours TTL
         
         # Search query caching
-        if event_type == 'search' and 'search_query' in event:
+        if search_counts:
             search_key = f"search_queries:{today}"
-            redis_client.zincrby(search_key, 1, event['search_query'])
-            redis_client.expire(search_key, 86400 * 7)  # 7 days TTL
+            for query, count in search_counts.items():
+                pipe.zincrby(search_key, count, query)
+            pipe.expire(search_key, 86400 * 7)  # 7 days TTL
     
-    def cache_product_data(self, redis_client: redis.Redis, product: Dict[str, Any]):
-        """Cache product data in Redis"""
+    def cache_product_data(self, pipe: redis.client.Pipeline, product: Dict[str, Any], expired: set):
+        """Queue product data cache writes on a Redis pipeline"""
         product_id = product['id']
         
         # Cache product details
         product_key = f"product:{product_id}"
-        redis_client.hset(product_key, mapping={
+        pipe.hset(product_key, mapping={
             'name': product['name'],
             'category': product['category'],
             'price': str(product['price']),
@@ -372,76 +540,104 @@ class DataProcessor:
             'stock_quantity': str(product.get('stock_quantity', 0)),
             'is_active': str(product.get('is_active', True))
         })
-        redis_client.expire(product_key, 3600)  # 1 hour TTL
+        _expire_once(pipe, expired, product_key, 3600)  # 1 hour TTL
         
         # Update category counters
         category_key = f"category_products:{product['category']}"
-        redis_client.sadd(category_key, product_id)
-        redis_client.expire(category_key, 86400)  # 24 hours TTL
+        pipe.sadd(category_key, product_id)
+        _expire_once(pipe, expired, category_key, 86400)  # 24 hours TTL
         
         # Cache for search
         search_key = f"product_search:{product['name'].lower()}"
-        redis_client.set(search_key, product_id, ex=3600)  # 1 hour TTL
+        pipe.set(search_key, product_id, ex=3600)  # 1 hour TTL
+
+# Processor shared across warm invocations
+_PROCESSOR = None
+_INITIALIZED = False
+_INDICES_READY = False
+
+def _get_processor() -> DataProcessor:
+    """Get the shared processor, connecting its clients and creating indices on first use"""
+    global _PROCESSOR, _INITIALIZED, _INDICES_READY
+    if _PROCESSOR is None:
+        _PROCESSOR = DataProcessor()
+    if not _INITIALIZED:
+        _PROCESSOR.get_opensearch_client()
+        _PROCESSOR.get_redis_client()
+        _INITIALIZED = True
+    if not _INDICES_READY:
+        _PROCESSOR.create_opensearch_indices()
+        _INDICES_READY = True
+    return _PROCESSOR
+
+# Connect during the Lambda INIT phase
+if os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
+    try:
+        _get_processor()
+    except Exception as e:
+        logger.warning(f"Deferring client initialization: {str(e)}")
 
 def lambda_handler(event, context):
     """Lambda handler for data processing"""
     logger.info("Starting data processing")
     
-    processor = DataProcessor()
-    
     try:
-        # Create indices if they don't exist
-        processor.create_opensearch_indices()
-        
-        # Process incoming data
-        total_processed = 0
-        
         # Handle different event sources
         if 'Records' in event:
             # SQS or SNS event
-            for record in event['Records']:
-                if 'body' in record:
-                    data = json.loads(record['body'])
-                else:
-                    data = record
-                
-                total_processed += process_data_batch(processor, data)
+            batches = [orjson.loads(record['body']) if 'body' in record else record
+                       for record in event['Records']]
         else:
             # Direct invocation
-            total_processed += process_data_batch(processor, event)
+            batches = [event]
+        
+        # Empty and heartbeat payloads never touch Redis or OpenSearch
+        batches = [data for data in batches if _has_data(data)]
+        
+        # Process incoming data
+        total_processed = 0
+        if batches:
+            # Connects clients and creates indices on the first invocation only
+            processor = _get_processor()
+            for data in batches:
+                total_processed += process_data_batch(processor, data)
         
         logger.info(f"Successfully processed {total_processed} records")
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'message': f'Successfully processed {total_processed} records',
                 'timestamp': datetime.utcnow().isoformat()
-            })
+            }).decode()
         }
         
     except Exception as e:
         logger.error(f"Error processing data: {str(e)}")
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'error': str(e),
                 'timestamp': datetime.utcnow().isoformat()
-            })
+            }).decode()
         }
 
+def _has_data(data: Any) -> bool:
+    """Check whether a payload carries events, products or a single event to process"""
+    return isinstance(data, dict) and bool(data.get('events') or data.get('products') or 'event_type' in data)
+
 def process_data_batch(processor: DataProcessor, data: Dict[str, Any]) -> int:
     """Process a batch of data"""
     total_processed = 0
     
     # Process events
-    if 'events' in data:
+    if data.get('events'):
         events_processed = processor.process_user_events(data['events'])
         total_processed += events_processed
         logger.info(f"Processed {events_processed} events")
     
     # Process products
-    if 'products' in data:
+    if data.get('products'):
         products_processed = processor.process_products(data['products'])
         total_processed += products_processed
         logger.info(f"Processed {products_processed} products")